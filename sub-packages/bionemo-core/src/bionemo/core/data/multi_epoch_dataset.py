@@ -130,20 +130,34 @@ class MultiEpochDatasetResampler(Dataset[T_co]):
 
     def __getitem__(self, index: int) -> T_co:
         """Get the sample at the given index."""
-        if index not in range(len(self)):
+        if not 0 <= index < len(self):
             raise IndexError(f"Index {index} out of bounds for dataset of length {len(self)}.")
         return self.dataset[self._global_index_to_permuted_local_index(index)]
 
+    def __getitems__(self, indices: list[int]) -> list[T_co]:
+        """Get the samples at the given indices.
+
+        This is called by the pytorch DataLoader with a full batch of indices. If the wrapped dataset also implements
+        `__getitems__`, the whole batch of epoch indices is forwarded to it so it can fetch its samples in one go.
+        """
+        for index in indices:
+            if not 0 <= index < len(self):
+                raise IndexError(f"Index {index} out of bounds for dataset of length {len(self)}.")
+        epoch_indices = [self._global_index_to_permuted_local_index(index) for index in indices]
+        if hasattr(self.dataset, "__getitems__"):
+            return self.dataset.__getitems__(epoch_indices)  # type: ignore[attr-defined]
+        return [self.dataset[index] for index in epoch_indices]
+
     def __len__(self) -> int:
         """Return the length of the resampled dataset."""
         return self.num_samples  # type: ignore
 
     def _global_index_to_permuted_local_index(self, index: int) -> EpochIndex:
         """Convert a global index to an epoch index."""
-        epoch = index // len(self.dataset)
-        idx = index % len(self.dataset)
+        dataset_len = len(self.dataset)
+        epoch, idx = divmod(index, dataset_len)
         if self.shuffle:
-            idx = permute(idx, len(self.dataset), self.epoch_seeds[epoch])
+            idx = permute(idx, dataset_len, self.epoch_seeds[epoch])
         return EpochIndex(epoch, idx)
 
 
@@ -119,6 +119,28 @@ def test_multi_epoch_dataset_wrapper_and_resampler():
             assert resampled_dataset[epoch * 10 + idx] == dataset[idx]
 
 
+def test_multi_epoch_dataset_getitems_matches_getitem():
+    dataset = IdentityMultiEpochDatasetWrapper(range(10))  # type: ignore
+    resampled_dataset = MultiEpochDatasetResampler(dataset, num_epochs=3, shuffle=True)
+
+    indices = [0, 7, 13, 29, 13]
+    assert resampled_dataset.__getitems__(indices) == [resampled_dataset[i] for i in indices]
+
+    with pytest.raises(IndexError):
+        resampled_dataset.__getitems__([0, 30])
+
+
+def test_multi_epoch_dataset_getitems_forwards_batch():
+    dataset = mock.MagicMock()
+    dataset.__len__.return_value = 5
+    dataset.__getitems__ = mock.MagicMock(return_value=["a", "b"])
+
+    multi_epoch_dataset = MultiEpochDatasetResampler(dataset, num_epochs=2, shuffle=False)
+    assert multi_epoch_dataset.__getitems__([1, 6]) == ["a", "b"]
+    dataset.__getitems__.assert_called_once_with([EpochIndex(0, 1), EpochIndex(1, 1)])
+    dataset.__getitem__.assert_not_called()
+
+
 def test_multi_epoch_dataset_memory_stress_test_epochs():
     dataset = range(1_000_000_000)
     multi_epoch_dataset = IdentityMultiEpochDatasetWrapper(dataset)  # type: ignore
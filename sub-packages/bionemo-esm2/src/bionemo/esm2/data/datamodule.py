@@ -163,7 +163,7 @@ class ESMDataModule(MegatronDataModule):
             stage="val",
         )
         self._valid_ds = dataset.create_valid_dataset(
-            clusters=self._valid_cluster_path,
+            clusters=val_clusters,
             db_path=self._valid_database_path,
             total_samples=num_val_samples,
             seed=self._seed,
@@ -16,17 +16,20 @@
 
 import os
 import sqlite3
+import threading
 from enum import Enum
 from pathlib import Path
 from typing import Sequence, TypeVar
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import torch
 from torch.utils.data import Dataset
 
 from bionemo.core.data.multi_epoch_dataset import EpochIndex, MultiEpochDatasetResampler
-from bionemo.core.utils import random_utils
 from bionemo.esm2.data import tokenizer
 from bionemo.llm.data import masking
 from bionemo.llm.data.types import BertSample
@@ -46,8 +49,32 @@ class RandomMaskStrategy(str, Enum):
     """Mask with all tokens in the tokenizer, including special tokens, padding and non-canonical amino acid tokens."""
 
 
+# Connection settings for the read-only protein databases. Memory-mapping the database file lets page reads be served
+#  from the OS page cache (shared between dataloader workers) instead of copying each page through a read() syscall
+#  into a per-connection cache. SQLite clamps `mmap_size` to its compile-time maximum, so a large value just means
+#  "map as much of the file as allowed".
+_SQLITE_PRAGMAS: tuple[str, ...] = (
+    "PRAGMA query_only = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 30000000000",
+    "PRAGMA cache_size = -65536",  # negative values are in KiB, i.e. 64 MiB.
+)
+
+_SELECT_SEQUENCE_SQL = "SELECT sequence FROM protein WHERE id = ?"
+"""Lookup query for a single sequence; kept constant so sqlite3's per-connection statement cache reuses the parse."""
+
+_MAX_SQL_VARIABLES = 999
+"""The smallest `SQLITE_MAX_VARIABLE_NUMBER` across sqlite builds; batched lookups are chunked to stay below it."""
+
+
 class ProteinSQLiteDataset(Dataset):
-    """Dataset for protein sequences stored in a SQLite database."""
+    """Dataset for protein sequences stored in a SQLite database.
+
+    The database connection is opened lazily, once per process and thread, since sqlite connections can be neither
+    pickled nor shared with forked dataloader workers. Each worker therefore opens its own connection on its first
+    lookup; use `persistent_workers=True` in the DataLoader (the default in `ESMDataModule`) so that connections, and
+    the page cache and prepared statements that come with them, are kept across epochs instead of being reopened.
+    """
 
     def __init__(self, db_path: str | os.PathLike):
         """Initializes the dataset.
@@ -55,10 +82,36 @@ class ProteinSQLiteDataset(Dataset):
         Args:
             db_path: Path to the SQLite database.
         """
-        self.conn = sqlite3.connect(str(db_path))
-        self.cursor = self.conn.cursor()
+        self.db_path = db_path
+        self._local = threading.local()
         self._len = None
 
+    def __getstate__(self) -> dict:
+        """Drops the open connections when pickling the dataset, e.g. to send it to spawned dataloader workers."""
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restores a pickled dataset, which then opens its own connection on first use."""
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        """A cursor on the connection for the current process and thread, opening the connection if needed."""
+        local = self._local
+        # Forked workers inherit the parent's thread-local state, so check the pid as well.
+        if getattr(local, "pid", None) != os.getpid():
+            # The database is only ever read, so open it read-only. This also skips any journal bookkeeping on open.
+            conn = sqlite3.connect(f"{Path(self.db_path).absolute().as_uri()}?mode=ro", uri=True)
+            for pragma in _SQLITE_PRAGMAS:
+                conn.execute(pragma)
+            local.conn = conn
+            local.cursor = conn.cursor()
+            local.pid = os.getpid()
+        return local.cursor
+
     def __len__(self) -> int:
         """Returns the number of proteins in the dataset.
 
@@ -73,7 +126,7 @@ class ProteinSQLiteDataset(Dataset):
     def __getitem__(self, idx: str) -> str:
         """Returns the sequence of a protein at a given index.
 
-        TODO: This method may want to support batched indexing for improved performance.
+        Use `get_many` to look up several sequences with a single query.
 
         Args:
             idx: An identifier for the protein sequence. For training data, these are UniRef90 IDs, while for validation
@@ -85,9 +138,38 @@ class ProteinSQLiteDataset(Dataset):
         if not isinstance(idx, str):
             raise TypeError(f"Expected string, got {type(idx)}: {idx}.")
 
-        self.cursor.execute("SELECT sequence FROM protein WHERE id = ?", (idx,))
+        self.cursor.execute(_SELECT_SEQUENCE_SQL, (idx,))
         return self.cursor.fetchone()[0]
 
+    def get_many(self, ids: Sequence[str]) -> list[str]:
+        """Returns the sequences of several proteins with a single query per chunk of ids.
+
+        Args:
+            ids: Identifiers for the protein sequences, see `__getitem__`. Duplicates are allowed.
+
+        Returns:
+            The protein sequences, in the same order as `ids`.
+
+        Raises:
+            KeyError: If any of the ids are not present in the database.
+        """
+        for idx in ids:
+            if not isinstance(idx, str):
+                raise TypeError(f"Expected string, got {type(idx)}: {idx}.")
+
+        unique_ids = list(dict.fromkeys(ids))
+        sequences: dict[str, str] = {}
+        for start in range(0, len(unique_ids), _MAX_SQL_VARIABLES):
+            chunk = unique_ids[start : start + _MAX_SQL_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            self.cursor.execute(f"SELECT id, sequence FROM protein WHERE id IN ({placeholders})", chunk)
+            sequences.update(self.cursor.fetchall())
+
+        missing = [idx for idx in unique_ids if idx not in sequences]
+        if missing:
+            raise KeyError(f"Protein ids not found in database: {missing}.")
+        return [sequences[idx] for idx in ids]
+
 
 class ESMMaskedResidueDataset(Dataset):
     """Dataset class for ESM pretraining that implements cluster sampling of UniRef50 and UniRef90 sequences.
@@ -142,7 +224,7 @@ class ESMMaskedResidueDataset(Dataset):
             tokenizer: The input ESM tokenizer. Defaults to the standard ESM tokenizer.
         """
         self.protein_dataset = protein_dataset
-        self.clusters = clusters
+        self.clusters = clusters if isinstance(clusters, _PackedClusters) else _PackedClusters.from_sequences(clusters)
         self.seed = seed
         self.max_seq_length = max_seq_length
         self.random_mask_strategy = random_mask_strategy
@@ -161,6 +243,13 @@ class ESMMaskedResidueDataset(Dataset):
         )
 
         self.tokenizer = tokenizer
+        self._residue_lut = _build_residue_lookup_table(tokenizer)
+
+        # The `types`, `is_random` and `attention_mask` fields are constant, so every sample gets a view of these rather
+        #  than freshly allocated tensors. Samples are cropped to `max_seq_length`, so the views always fit. The views
+        #  share memory, so they must not be modified in place; the collate functions copy them into a new batch.
+        self._zeros = torch.zeros(max_seq_length, dtype=torch.int64)
+        self._ones = torch.ones(max_seq_length, dtype=torch.int64)
 
     def __len__(self) -> int:
         """Returns the number of clusters, which constitutes a single epoch."""
@@ -178,33 +267,75 @@ class ESMMaskedResidueDataset(Dataset):
         Returns:
             A (possibly-truncated), masked protein sequence with CLS and EOS tokens and associated mask fields.
         """
+        rng, sequence_id = self._sample_sequence_id(index)
+        return self._mask_sequence(self.protein_dataset[sequence_id], rng)
+
+    def __getitems__(self, indices: list[EpochIndex]) -> list[BertSample]:
+        """Returns a batch of samples, fetching all of their sequences from the protein dataset at once.
+
+        The pytorch DataLoader calls this with a full batch of indices. Each returned sample is identical to
+        `self[index]`; the only difference is that a `ProteinSQLiteDataset` is queried once for the whole batch rather
+        than once per sample.
+
+        Args:
+            indices: The epochs and indices of the clusters to sample.
+
+        Returns:
+            A list of samples in the same order as `indices`.
+        """
+        draws = [self._sample_sequence_id(index) for index in indices]
+        sequence_ids = [sequence_id for _, sequence_id in draws]
+        if isinstance(self.protein_dataset, ProteinSQLiteDataset):
+            sequences = self.protein_dataset.get_many(sequence_ids)
+        else:
+            sequences = [self.protein_dataset[sequence_id] for sequence_id in sequence_ids]
+        return [self._mask_sequence(sequence, rng) for (rng, _), sequence in zip(draws, sequences)]
+
+    def _sample_sequence_id(self, index: EpochIndex) -> tuple[np.random.Generator, str]:
+        """Picks the sequence to use for a given index from its cluster.
+
+        Returns:
+            The random number generator for this index, which is then used for cropping and masking, and the id of
+            the chosen sequence.
+        """
+        if not 0 <= index.idx < len(self.clusters):
+            raise IndexError(f"Index {index.idx} out of bounds for {len(self.clusters)} clusters.")
+        start, stop = int(self.clusters.offsets[index.idx]), int(self.clusters.offsets[index.idx + 1])
+        if start == stop:
+            raise ValueError(f"Cluster {index.idx} is empty.")
+
         # Initialize a random number generator with a seed that is a combination of the dataset seed, epoch, and index.
         rng = np.random.default_rng([self.seed, index.epoch, index.idx])
-        if not len(self.clusters[index.idx]):
-            raise ValueError(f"Cluster {index.idx} is empty.")
 
-        sequence_id = rng.choice(self.clusters[index.idx])
-        sequence = self.protein_dataset[sequence_id]
+        # Picking `start + rng.integers(0, size)` draws the same id as `rng.choice(cluster)` and leaves `rng` in the
+        #  same state, without building the cluster as an array first. Validation clusters always hold a single
+        #  sequence, and `rng.choice` over one element does not advance the generator, so no draw is made for them.
+        if stop - start > 1:
+            start += int(rng.integers(0, stop - start))
+        sequence_id = self.clusters.ids[start].as_py()
+        return rng, sequence_id
 
+    def _mask_sequence(self, sequence: str, rng: np.random.Generator) -> BertSample:
+        """Tokenizes, crops and masks a protein sequence using the per-index random number generator."""
         # We don't want special tokens before we pass the input to the masking function; we add these in the collate_fn.
-        tokenized_sequence = self._tokenize(sequence)
-        cropped_sequence = _random_crop(tokenized_sequence, self.max_seq_length, rng)
-
-        # Get a single integer seed for torch from our rng, since the index tuple is hard to pass directly to torch.
-        torch_seed = random_utils.get_seed_from_rng(rng)
-        masked_sequence, labels, loss_mask = masking.apply_bert_pretraining_mask(
-            tokenized_sequence=cropped_sequence,  # type: ignore
-            random_seed=torch_seed,
+        cropped_sequence = self._tokenize_and_crop(sequence, rng)
+
+        # Masking is done in numpy with the same rng; `.numpy()` and `torch.from_numpy` share memory, so neither
+        #  conversion copies.
+        masked_sequence, labels, loss_mask = masking.apply_bert_pretraining_mask_numpy(
+            tokenized_sequence=cropped_sequence.numpy(),
+            rng=rng,
             mask_config=self.mask_config,
         )
+        num_tokens = len(masked_sequence)
 
         return {
-            "text": masked_sequence,
-            "types": torch.zeros_like(masked_sequence, dtype=torch.int64),
-            "attention_mask": torch.ones_like(masked_sequence, dtype=torch.int64),
-            "labels": labels,
-            "loss_mask": loss_mask,
-            "is_random": torch.zeros_like(masked_sequence, dtype=torch.int64),
+            "text": torch.from_numpy(masked_sequence),
+            "types": self._zeros[:num_tokens],
+            "attention_mask": self._ones[:num_tokens],
+            "labels": torch.from_numpy(labels),
+            "loss_mask": torch.from_numpy(loss_mask),
+            "is_random": self._zeros[:num_tokens],
         }
 
     def _tokenize(self, sequence: str) -> torch.Tensor:
@@ -216,8 +347,112 @@ class ESMMaskedResidueDataset(Dataset):
         Returns:
             The tokenized sequence.
         """
-        tensor = self.tokenizer.encode(sequence, add_special_tokens=True, return_tensors="pt")
-        return tensor.flatten()  # type: ignore
+        residue_ids = self._lookup_residue_ids(sequence)
+        if residue_ids is None:
+            tensor = self.tokenizer.encode(sequence, add_special_tokens=True, return_tensors="pt")
+            return tensor.flatten()  # type: ignore
+        return self._assemble_tokens(residue_ids, 0, len(residue_ids) + 2)
+
+    def _tokenize_and_crop(self, sequence: str, rng: np.random.Generator) -> torch.Tensor:
+        """Tokenize a protein sequence and randomly crop it to at most `max_seq_length` tokens.
+
+        This returns exactly `_random_crop(self._tokenize(sequence), self.max_seq_length, rng)`, but when the sequence
+        can be tokenized with the lookup table the crop window is chosen first, so only the kept tokens are built.
+        """
+        residue_ids = self._lookup_residue_ids(sequence)
+        if residue_ids is None:
+            return _random_crop(self._tokenize(sequence), self.max_seq_length, rng)
+
+        start, stop = _random_crop_bounds(len(residue_ids) + 2, self.max_seq_length, rng)
+        return self._assemble_tokens(residue_ids, start, stop)
+
+    def _lookup_residue_ids(self, sequence: str) -> np.ndarray | None:
+        """Token ids of each character of `sequence`, or None if it needs the huggingface tokenizer.
+
+        Every character of a typical sequence is a single-character token, so tokenizing is a per-byte table lookup.
+        Anything else (non-ascii, or characters without their own token) has to go through the huggingface tokenizer,
+        which for example merges runs of unknown characters into a single <unk>.
+        """
+        try:
+            residue_ids = self._residue_lut[np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)]
+        except UnicodeEncodeError:
+            return None
+        if (residue_ids < 0).any():
+            return None
+        return residue_ids
+
+    def _assemble_tokens(self, residue_ids: np.ndarray, start: int, stop: int) -> torch.Tensor:
+        """Builds tokens `[start, stop)` of the sequence `<cls> + residues + <eos>`."""
+        num_tokens = len(residue_ids) + 2
+        tokens = np.empty(stop - start, dtype=np.int64)
+        offset = 0
+        if start == 0:
+            tokens[0] = self.tokenizer.cls_token_id
+            offset = 1
+        residues = residue_ids[max(start - 1, 0) : min(stop - 1, len(residue_ids))]
+        tokens[offset : offset + len(residues)] = residues
+        if stop == num_tokens:
+            tokens[-1] = self.tokenizer.eos_token_id
+        return torch.from_numpy(tokens)
+
+
+class _PackedClusters(Sequence[list[str]]):
+    """Clusters of sequence ids stored as one flat array of ids plus an array of offsets (CSR layout).
+
+    Cluster `i` holds the ids `ids[offsets[i]:offsets[i + 1]]`. Unlike a list of python lists, both are single
+    contiguous buffers, so they are shared copy-on-write with forked dataloader workers instead of being copied page
+    by page as reference counts are touched.
+    """
+
+    def __init__(self, ids: pa.LargeStringArray, offsets: np.ndarray):
+        """Initializes the clusters.
+
+        Args:
+            ids: The sequence ids of all clusters, concatenated.
+            offsets: An int64 array of length `num_clusters + 1`, with the start of each cluster in `ids` followed by
+                `len(ids)`.
+        """
+        self.ids = ids
+        self.offsets = offsets
+
+    @classmethod
+    def from_arrow(cls, column: pa.ChunkedArray) -> "_PackedClusters":
+        """Packs a list-of-strings column, with one cluster of sequence ids per row. Null rows are empty clusters."""
+        # Use the 64-bit offset types, since the ids of a large cluster file can exceed the 2GiB limit of a regular
+        #  arrow string array.
+        clusters = column.cast(pa.large_list(pa.large_string())).combine_chunks()
+        lengths = pc.list_value_length(clusters).fill_null(0).to_numpy()
+        return cls(clusters.flatten(), _lengths_to_offsets(lengths))
+
+    @classmethod
+    def from_sequences(cls, clusters: Sequence[Sequence[str]]) -> "_PackedClusters":
+        """Packs a sequence of clusters of sequence ids."""
+        lengths = np.fromiter((len(cluster) for cluster in clusters), dtype=np.int64, count=len(clusters))
+        ids = pa.array([idx for cluster in clusters for idx in cluster], type=pa.large_string())
+        return cls(ids, _lengths_to_offsets(lengths))
+
+    def __len__(self) -> int:
+        """Returns the number of clusters."""
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> list[str]:  # type: ignore[override]
+        """Returns the sequence ids in the cluster at the given index."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Index {index} out of bounds for {len(self)} clusters.")
+        start, stop = int(self.offsets[index]), int(self.offsets[index + 1])
+        return self.ids[start:stop].to_pylist()
+
+
+def _lengths_to_offsets(lengths: np.ndarray) -> np.ndarray:
+    """Converts cluster lengths to CSR offsets, i.e. their cumulative sum with a leading zero."""
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _parquet_column_names(path: str | os.PathLike) -> list[str]:
+    """Returns the column names of a parquet file, or of a directory of parquet files, without reading any rows."""
+    return pq.ParquetDataset(path).schema.names
 
 
 def create_train_dataset(
@@ -260,14 +495,17 @@ def create_train_dataset(
     if not Path(db_path).exists():
         raise ValueError(f"Database file {db_path} not found.")
 
-    cluster_df = pd.read_parquet(cluster_file)
-    if "ur90_id" not in cluster_df.columns:
-        raise ValueError(f"Training cluster file must contain a 'ur90_id' column. Found columns {cluster_df.columns}.")
+    columns = _parquet_column_names(cluster_file)
+    if "ur90_id" not in columns:
+        raise ValueError(f"Training cluster file must contain a 'ur90_id' column. Found columns {columns}.")
+
+    # Only read the column we need, and keep it in arrow memory rather than converting every id to a python object.
+    clusters = _PackedClusters.from_arrow(pq.read_table(cluster_file, columns=["ur90_id"]).column("ur90_id"))
 
     protein_dataset = ProteinSQLiteDataset(db_path)
     masked_cluster_dataset = ESMMaskedResidueDataset(
         protein_dataset=protein_dataset,
-        clusters=cluster_df["ur90_id"],
+        clusters=clusters,
         seed=seed,
         max_seq_length=max_seq_length,
         mask_prob=mask_prob,
@@ -280,30 +518,31 @@ def create_train_dataset(
     return MultiEpochDatasetResampler(masked_cluster_dataset, num_samples=total_samples, shuffle=True, seed=seed)
 
 
-def create_valid_clusters(cluster_file: str | os.PathLike) -> pd.Series:
-    """Create a pandas series of UniRef50 cluster IDs from a cluster parquet file.
+def create_valid_clusters(cluster_file: str | os.PathLike) -> Sequence[Sequence[str]]:
+    """Create a sequence of single-sequence UniRef50 clusters from a cluster parquet file.
 
     Args:
         cluster_file: Path to the cluster file. The file should contain a single column named "ur50_id" with UniRef50
         IDs, with one UniRef50 ID per row.
 
     Returns:
-        A pandas series of UniRef50 cluster IDs.
+        The UniRef50 cluster IDs, as a sequence of length-1 clusters.
     """
     if not Path(cluster_file).exists():
         raise ValueError(f"Cluster file {cluster_file} not found.")
 
-    cluster_df = pd.read_parquet(cluster_file)
-    if "ur50_id" not in cluster_df.columns:
-        raise ValueError(
-            f"Validation cluster file must contain a 'ur50_id' column. Found columns {cluster_df.columns}."
-        )
-    clusters = cluster_df["ur50_id"].apply(lambda x: [x])
-    return clusters
+    columns = _parquet_column_names(cluster_file)
+    if "ur50_id" not in columns:
+        raise ValueError(f"Validation cluster file must contain a 'ur50_id' column. Found columns {columns}.")
+
+    # Each id is its own cluster, so the ids can be used as-is with one offset per row, rather than wrapping every id
+    #  in a list of its own.
+    ids = pq.read_table(cluster_file, columns=["ur50_id"]).column("ur50_id").cast(pa.large_string()).combine_chunks()
+    return _PackedClusters(ids, np.arange(len(ids) + 1, dtype=np.int64))
 
 
 def create_valid_dataset(  # noqa: D417
-    clusters: pd.Series | str | os.PathLike,
+    clusters: Sequence[Sequence[str]] | pd.Series | str | os.PathLike,
     db_path: str | os.PathLike,
     seed: int,
     total_samples: int | None = None,
@@ -317,8 +556,8 @@ def create_valid_dataset(  # noqa: D417
     """Creates a validation dataset for ESM pretraining.
 
     Args:
-        cluster_file: Clusters as pd.Series, or path to the cluster file. The file should contain a single column named "ur50_id" with UniRef50
-            IDs, with one UniRef50 ID per row.
+        cluster_file: Clusters as returned by `create_valid_clusters` or as a pd.Series, or path to the cluster file.
+            The file should contain a single column named "ur50_id" with UniRef50 IDs, with one UniRef50 ID per row.
         db_path: Path to the SQLite database.
         total_samples: Total number of samples to draw from the dataset.
         seed: Random seed for reproducibility.
@@ -335,8 +574,10 @@ def create_valid_dataset(  # noqa: D417
     if isinstance(clusters, (str, os.PathLike)):
         clusters = create_valid_clusters(clusters)
 
-    elif not isinstance(clusters, pd.Series):
-        raise ValueError(f"Clusters must be a pandas Series. Got {type(clusters)}.")
+    elif not isinstance(clusters, (_PackedClusters, pd.Series)):
+        raise ValueError(
+            f"Clusters must be a pandas Series or created by create_valid_clusters. Got {type(clusters)}."
+        )
 
     if not Path(db_path).exists():
         raise ValueError(f"Database file {db_path} not found.")
@@ -357,6 +598,15 @@ def create_valid_dataset(  # noqa: D417
     return MultiEpochDatasetResampler(masked_dataset, num_samples=total_samples, shuffle=True, seed=seed)
 
 
+def _build_residue_lookup_table(tokenizer: tokenizer.BioNeMoESMTokenizer) -> np.ndarray:
+    """Maps each ascii byte to the id of its single-character token, or -1 if there is no such token."""
+    lut = np.full(256, -1, dtype=np.int64)
+    for token, token_id in tokenizer.get_vocab().items():
+        if len(token) == 1 and ord(token) < 128:
+            lut[ord(token)] = token_id
+    return lut
+
+
 _T = TypeVar("_T", str, torch.Tensor)
 
 
@@ -365,5 +615,14 @@ def _random_crop(s: _T, crop_length: int, rng: np.random.Generator) -> _T:
     if crop_length >= len(s):
         return s
 
-    start_index = rng.integers(0, len(s) - crop_length)
-    return s[start_index : start_index + crop_length]
+    start_index, stop_index = _random_crop_bounds(len(s), crop_length, rng)
+    return s[start_index:stop_index]
+
+
+def _random_crop_bounds(length: int, crop_length: int, rng: np.random.Generator) -> tuple[int, int]:
+    """Randomly picks a window of at most `crop_length` out of `length` elements, as `_random_crop` does."""
+    if crop_length >= length:
+        return 0, length
+
+    start_index = int(rng.integers(0, length - crop_length))
+    return start_index, start_index + crop_length
@@ -65,7 +65,7 @@ class ESM2Model(MegatronBioBertModel):
         post_process: bool = True,
         fp16_lm_cross_entropy: bool = False,
         parallel_output: bool = True,
-        share_embeddings_and_output_weights: bool = False,
+        share_embeddings_and_output_weights: bool = True,
         position_embedding_type: Literal["learned_absolute", "rope"] = "learned_absolute",
         rotary_percent: float = 1.0,
         seq_len_interpolation_factor: Optional[float] = None,
@@ -90,7 +90,7 @@ class ESM2Model(MegatronBioBertModel):
             post_process (bool): Include an output layer (used with pipeline parallelism)
             fp16_lm_cross_entropy: Whether to move the cross entropy unreduced loss calculation for lm head to fp16.
             parallel_output (bool): Do not gather the outputs, keep them split across tensor parallel ranks
-            share_embeddings_and_output_weights (bool): When True, input embeddings and output logit weights are shared. Defaults to False.
+            share_embeddings_and_output_weights (bool): When True, input embeddings and output logit weights are shared. Defaults to True.
             position_embedding_type (string): Position embedding type. Options ['learned_absolute', 'rope'].
                 Defaults is 'learned_absolute'.
             rotary_percent (float): Percent of rotary dimension to use for rotary position embeddings.
@@ -93,6 +93,7 @@ class ESM2DataConfig(DataConfig[ESMDataModule]):
             min_seq_length=self.min_seq_length,
             max_seq_length=self.max_seq_length,
             num_workers=self.num_dataset_workers,
+            persistent_workers=self.num_dataset_workers > 0,
             random_mask_strategy=self.random_mask_strategy,
             tokenizer=tokenizer,
         )
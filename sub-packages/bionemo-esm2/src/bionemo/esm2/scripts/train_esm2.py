@@ -227,6 +227,8 @@ def main(
         min_seq_length=min_seq_length,
         max_seq_length=max_seq_length,
         num_workers=num_dataset_workers,
+        # keep workers (and their open sqlite connections) alive across epochs; only supported when num_workers > 0
+        persistent_workers=num_dataset_workers > 0,
         random_mask_strategy=random_mask_strategy,
         tokenizer=tokenizer,
     )
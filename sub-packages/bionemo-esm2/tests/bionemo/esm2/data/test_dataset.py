@@ -14,7 +14,11 @@
 # limitations under the License.
 
 
+import pickle
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import pytest
 import torch
 
@@ -22,7 +26,10 @@ from bionemo.core.data.multi_epoch_dataset import EpochIndex
 from bionemo.esm2.data.dataset import (
     ESMMaskedResidueDataset,
     ProteinSQLiteDataset,
+    _PackedClusters,
+    _random_crop,
     create_train_dataset,
+    create_valid_clusters,
     create_valid_dataset,
 )
 from bionemo.testing.megatron_dataset_compatibility import assert_dataset_elements_not_equal
@@ -42,6 +49,39 @@ def test_protein_sqlite_dataset(dummy_protein_dataset):
     assert dataset["UniRef50_B"] == "MRILERSKEPVSGAQLA"
 
 
+def test_protein_sqlite_dataset_get_many(dummy_protein_dataset):
+    dataset = ProteinSQLiteDataset(dummy_protein_dataset)
+
+    ids = ["UniRef50_B", "UniRef90_A", "UniRef50_B", "UniRef90_C"]
+    assert dataset.get_many(ids) == [dataset[i] for i in ids]
+
+    with pytest.raises(KeyError, match="UniRef90_Z"):
+        dataset.get_many(["UniRef90_A", "UniRef90_Z"])
+
+
+def test_protein_sqlite_dataset_can_be_pickled(dummy_protein_dataset):
+    dataset = ProteinSQLiteDataset(dummy_protein_dataset)
+    assert dataset["UniRef90_A"] == "ACDEFGHIKLMNPQRSTVWY"  # Opens a connection, which can't be pickled itself.
+
+    unpickled = pickle.loads(pickle.dumps(dataset))
+    assert unpickled["UniRef90_A"] == "ACDEFGHIKLMNPQRSTVWY"
+    assert len(unpickled) == 5
+
+
+def test_ESMPreTrainingDataset_getitems_matches_getitem(dummy_protein_dataset):
+    protein_dataset = ProteinSQLiteDataset(dummy_protein_dataset)
+    clusters = [["UniRef90_A"], ["UniRef90_B", "UniRef90_C"]]
+    esm_dataset = ESMMaskedResidueDataset(protein_dataset=protein_dataset, clusters=clusters, seed=123)
+
+    indices = [EpochIndex(0, 1), EpochIndex(0, 0), EpochIndex(3, 1), EpochIndex(0, 1)]
+    batch = esm_dataset.__getitems__(indices)
+    assert len(batch) == len(indices)
+    for index, sample in zip(indices, batch):
+        expected = esm_dataset[index]
+        for key in expected:
+            torch.testing.assert_close(sample[key], expected[key])
+
+
 def test_ESMPreTrainingDataset_getitem_has_expected_structure(dummy_protein_dataset, tokenizer):
     protein_dataset = ProteinSQLiteDataset(dummy_protein_dataset)
     clusters = [["UniRef90_A"], ["UniRef90_B", "UniRef90_C"]]
@@ -61,6 +101,41 @@ def test_ESMPreTrainingDataset_getitem_has_expected_structure(dummy_protein_data
     assert sample["text"][-1] == tokenizer.eos_token_id
 
 
+@pytest.mark.parametrize(
+    "sequence",
+    [
+        "ACDEFGHIKLMNPQRSTVWY",
+        "LAGVSERTIDPKQNFYMHWCXBUZO.-",
+        "",
+        "ACDjbEF",  # Unknown characters fall back to the huggingface tokenizer.
+        "ACD<mask>EF",
+        "ACDÉEF",
+    ],
+)
+def test_ESMPreTrainingDataset_tokenize_matches_tokenizer(dummy_protein_dataset, tokenizer, sequence):
+    protein_dataset = ProteinSQLiteDataset(dummy_protein_dataset)
+    esm_dataset = ESMMaskedResidueDataset(protein_dataset=protein_dataset, clusters=[["UniRef90_A"]], seed=123)
+
+    expected = tokenizer.encode(sequence, add_special_tokens=True, return_tensors="pt").flatten()
+    torch.testing.assert_close(esm_dataset._tokenize(sequence), expected)
+
+
+@pytest.mark.parametrize("max_seq_length", [1, 2, 3, 10, 21, 22, 1024])
+@pytest.mark.parametrize("sequence", ["ACDEFGHIKLMNPQRSTVWY", "ACDjbEFGHIKLMNPQRSTVWY"])
+def test_ESMPreTrainingDataset_tokenize_and_crop_matches_crop_after_tokenize(
+    dummy_protein_dataset, sequence, max_seq_length
+):
+    protein_dataset = ProteinSQLiteDataset(dummy_protein_dataset)
+    esm_dataset = ESMMaskedResidueDataset(
+        protein_dataset=protein_dataset, clusters=[["UniRef90_A"]], seed=123, max_seq_length=max_seq_length
+    )
+
+    for seed in range(10):
+        expected = _random_crop(esm_dataset._tokenize(sequence), max_seq_length, np.random.default_rng(seed))
+        cropped = esm_dataset._tokenize_and_crop(sequence, np.random.default_rng(seed))
+        torch.testing.assert_close(cropped, expected)
+
+
 def test_ESMPreTrainingDataset_changes_with_epoch(dummy_protein_dataset, tokenizer):
     protein_dataset = ProteinSQLiteDataset(dummy_protein_dataset)
     clusters = [["UniRef90_A"], ["UniRef90_B", "UniRef90_C"]]
@@ -189,6 +264,40 @@ def test_create_train_dataset(dummy_protein_dataset, tmp_path):
     dataset[6]  # Make sure it doesn't crash.
 
 
+def test_create_train_dataset_reads_parquet_directory(dummy_protein_dataset, tmp_path):
+    cluster_dir = tmp_path / "train_clusters"
+    cluster_dir.mkdir()
+    pd.DataFrame({"ur90_id": [["UniRef90_A"]]}).to_parquet(cluster_dir / "part-0.parquet")
+    pd.DataFrame({"ur90_id": [["UniRef90_B", "UniRef90_C"]]}).to_parquet(cluster_dir / "part-1.parquet")
+
+    dataset = create_train_dataset(cluster_file=cluster_dir, db_path=dummy_protein_dataset, total_samples=10, seed=123)
+    assert len(dataset) == 10
+    assert len(dataset.dataset) == 2
+    dataset[6]  # Make sure it doesn't crash.
+
+
+def test_create_train_dataset_raises_without_ur90_id_column(dummy_protein_dataset, tmp_path):
+    pd.DataFrame({"ur50_id": ["UniRef50_A"]}).to_parquet(tmp_path / "train_clusters.parquet")
+
+    with pytest.raises(ValueError, match="ur90_id"):
+        create_train_dataset(
+            cluster_file=tmp_path / "train_clusters.parquet", db_path=dummy_protein_dataset, total_samples=10, seed=123
+        )
+
+
+def test_packed_clusters_from_arrow_matches_from_sequences():
+    column = pa.chunked_array([pa.array([["UniRef90_A"]]), pa.array([["UniRef90_B", "UniRef90_C"], None])])
+    from_arrow = _PackedClusters.from_arrow(column)
+    from_sequences = _PackedClusters.from_sequences([["UniRef90_A"], ["UniRef90_B", "UniRef90_C"], []])
+
+    for clusters in (from_arrow, from_sequences):
+        assert len(clusters) == 3
+        assert [clusters[i] for i in range(3)] == [["UniRef90_A"], ["UniRef90_B", "UniRef90_C"], []]
+        np.testing.assert_array_equal(clusters.offsets, [0, 1, 3, 3])
+        with pytest.raises(IndexError):
+            clusters[3]
+
+
 def test_create_valid_dataset(dummy_protein_dataset, tmp_path):
     cluster_file = pd.DataFrame(
         {
@@ -203,3 +312,28 @@ def test_create_valid_dataset(dummy_protein_dataset, tmp_path):
     )
     assert len(dataset) == 3
     dataset[2]  # Make sure it doesn't crash.
+
+
+def test_create_valid_clusters_returns_singleton_clusters(tmp_path):
+    pd.DataFrame({"ur50_id": ["UniRef50_A", "UniRef50_B"]}).to_parquet(tmp_path / "valid_clusters.parquet")
+
+    clusters = create_valid_clusters(tmp_path / "valid_clusters.parquet")
+    assert len(clusters) == 2
+    assert [clusters[i] for i in range(2)] == [["UniRef50_A"], ["UniRef50_B"]]
+
+
+def test_create_valid_clusters_reads_parquet_directory(tmp_path):
+    cluster_dir = tmp_path / "valid_clusters"
+    cluster_dir.mkdir()
+    pd.DataFrame({"ur50_id": ["UniRef50_A", "UniRef50_B"]}).to_parquet(cluster_dir / "part-0.parquet")
+    pd.DataFrame({"ur50_id": ["UniRef50_C"]}).to_parquet(cluster_dir / "part-1.parquet")
+
+    clusters = create_valid_clusters(cluster_dir)
+    assert [clusters[i] for i in range(len(clusters))] == [["UniRef50_A"], ["UniRef50_B"], ["UniRef50_C"]]
+
+
+def test_create_valid_clusters_raises_without_ur50_id_column(tmp_path):
+    pd.DataFrame({"ur90_id": [["UniRef90_A"]]}).to_parquet(tmp_path / "valid_clusters.parquet")
+
+    with pytest.raises(ValueError, match="ur50_id"):
+        create_valid_clusters(tmp_path / "valid_clusters.parquet")
@@ -154,6 +154,7 @@ class SingleCellDataset(Dataset):
             )
             self.metadata = metadata
             self.feature_ids = None
+            self.feature_token_ids = None
 
             # map row indices to dataset id
             self.dataset_ccum = np.zeros(
@@ -173,6 +174,8 @@ class SingleCellDataset(Dataset):
                 "Feature ids are the same across datasets. This is good, using the same feature_ids for all datasets."
             )
             self.feature_ids = feature_ids
+            # Tokenize every feature once up front, so samples look up their gene tokens with a single array index.
+            self.feature_token_ids = _lookup_token_ids(feature_ids, tokenizer.vocab)
             self.metadata = None
 
     def __len__(self):  # noqa: D105
@@ -180,7 +183,9 @@ class SingleCellDataset(Dataset):
 
     def metadata_lookup(self, idx) -> Dict[str, np.ndarray]:
         """Go from a cell idx to the file-level metadata associated with that cell."""
-        did = sum(~(self.dataset_ccum > idx)) - 1
+        # `dataset_ccum` is sorted, so the number of entries <= idx is a binary search rather than a python-level sum
+        #  over a comparison against every dataset.
+        did = int(np.searchsorted(self.dataset_ccum, idx, side="right")) - 1
         metadata = self.metadata[self.dataset_map[did]]
         return metadata
 
@@ -218,26 +223,33 @@ class SingleCellDataset(Dataset):
             random_token_prob=self.random_token_prob,
             prepend_cls_token=self.prepend_cls_token,
             eos_token=self.eos_token,
+            feature_token_ids=self.feature_token_ids,
         )
 
 
+def _lookup_token_ids(gene_names: np.ndarray, vocab: dict[str, int]) -> np.ndarray:
+    """Tokenize gene names, with -1 for genes that are not in the vocab."""
+    return np.fromiter((vocab.get(tok, -1) for tok in gene_names), dtype=np.int64, count=len(gene_names))
+
+
 def _gather_medians(
     gene_names: np.ndarray,
     gene_data: np.ndarray,
+    token_ids: np.ndarray,
     normalize: bool,
-    vocab: dict[str, int],
     gene_median: dict[str, float],
 ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
-    """Filter out genes that are not in the provided tokenizer vocab, and tokenize the gene names."""
-    genes, tokens, medians = [], [], []
-    for tok, gene in zip(gene_names, gene_data):
-        if tok in vocab:
-            tokens.append(vocab[tok])
-            genes.append(gene)
-            if normalize:
-                med = gene_median[tok]  # If not in the dictionary we default to no normalization (1)
-                medians.append(med)
-    return np.asarray(genes), np.asarray(tokens), np.asarray(medians)
+    """Filter out genes that are not in the provided tokenizer vocab, i.e. that have a token id of -1."""
+    # The arrays are selected with one mask and medians filled in a single pass with `np.fromiter`, rather than
+    #  appending to python lists gene by gene.
+    in_vocab = token_ids >= 0
+    gene_names = gene_names[in_vocab]
+    tokens = token_ids[in_vocab]
+    if normalize:
+        medians = np.fromiter((gene_median[tok] for tok in gene_names), dtype=np.float64, count=len(gene_names))
+    else:
+        medians = np.asarray([])
+    return np.asarray(gene_data)[in_vocab], tokens, medians
 
 
 def process_item(  # noqa: D417
@@ -255,6 +267,7 @@ def process_item(  # noqa: D417
     normalize: bool = True,
     prepend_cls_token: bool = True,
     eos_token: None | int = None,
+    feature_token_ids: np.ndarray | None = None,
 ) -> types.BertSample:
     """Process a single item in the dataset.
 
@@ -277,6 +290,8 @@ def process_item(  # noqa: D417
         dirichlet_alpha (float): Alpha value for dirichlet sampling if set by `probabilistic_dirichlet_sampling`. Defaults to 0.5.
         same_length (bool): when true, sample the same length of genes as you originally had before the dirichlet sampler.
         recompute_globals (bool): when true, global arrays are always recomputed. this is only useful for testing.
+        feature_token_ids (optional(np.ndarray)): Token ids of every entry in `feature_ids`, with -1 for features that
+            are not in the tokenizer vocab. If not provided, the expressed genes are looked up in `tokenizer.vocab`.
 
     Returns:
         dict: Processed item dictionary.
@@ -296,9 +311,13 @@ def process_item(  # noqa: D417
         max_len = max_len - 1  # - minus 1 for [EOS] token
 
     gene_names = feature_ids[gene_idxs]
+    if feature_token_ids is None:
+        gene_token_ids = _lookup_token_ids(gene_names, tokenizer.vocab)
+    else:
+        gene_token_ids = feature_token_ids[gene_idxs]
 
     gene_expression_cell, token_ids, gene_expression_medians = _gather_medians(
-        gene_names, gene_data, normalize, tokenizer.vocab, gene_median
+        gene_names, gene_data, gene_token_ids, normalize, gene_median
     )
 
     if normalize:
@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-Apache2
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+
+from bionemo.geneformer.data.singlecell.dataset import _gather_medians, _lookup_token_ids, process_item
+
+
+class ToyGeneTokenizer:
+    """The subset of `GeneTokenizer` that `process_item` uses."""
+
+    cls_token = "[CLS]"
+
+    def __init__(self):
+        self.special_tokens = ["[CLS]", "[MASK]", "[PAD]", "[UKW]"]
+        self.vocab = {tok: i for i, tok in enumerate(self.special_tokens + ["ENSG1", "ENSG2", "ENSG3", "ENSG4"])}
+
+    def token_to_id(self, token):
+        return self.vocab.get(token)
+
+    @property
+    def mask_token_id(self):
+        return self.vocab["[MASK]"]
+
+    @property
+    def all_special_ids(self):
+        return [self.vocab[tok] for tok in self.special_tokens]
+
+
+# ENSG_MISSING is a feature of the dataset but not in the tokenizer vocab, so it must be dropped from the cell.
+FEATURE_IDS = np.array(["ENSG3", "ENSG_MISSING", "ENSG1", "ENSG4", "ENSG2"])
+GENE_MEDIAN = {"ENSG1": 2.0, "ENSG2": 0.5, "ENSG3": 1.0, "ENSG4": 4.0}
+
+
+def test_lookup_token_ids_marks_genes_missing_from_vocab():
+    token_ids = _lookup_token_ids(FEATURE_IDS, ToyGeneTokenizer().vocab)
+    np.testing.assert_array_equal(token_ids, [6, -1, 4, 7, 5])
+
+
+def test_gather_medians_drops_genes_missing_from_vocab():
+    gene_idxs = np.array([0, 1, 2, 4])
+    gene_names = FEATURE_IDS[gene_idxs]
+    gene_data = np.array([10.0, 20.0, 30.0, 40.0])
+    token_ids = _lookup_token_ids(gene_names, ToyGeneTokenizer().vocab)
+
+    data, tokens, medians = _gather_medians(gene_names, gene_data, token_ids, True, GENE_MEDIAN)
+
+    np.testing.assert_array_equal(data, [10.0, 30.0, 40.0])
+    np.testing.assert_array_equal(tokens, [6, 4, 5])
+    np.testing.assert_array_equal(medians, [1.0, 2.0, 0.5])
+
+
+@pytest.mark.parametrize(
+    "normalize, expected_tokens",
+    [
+        # Ranked by normalized expression: ENSG2, ENSG3, ENSG4, ENSG1.
+        (True, [0, 5, 6, 7, 4]),
+        # Kept in feature order: ENSG3, ENSG1, ENSG4, ENSG2.
+        (False, [0, 6, 4, 7, 5]),
+    ],
+)
+@pytest.mark.parametrize("mask_prob", [0.0, 0.5])
+def test_process_item_same_with_precomputed_feature_token_ids(normalize, expected_tokens, mask_prob):
+    tokenizer = ToyGeneTokenizer()
+    kwargs = {
+        "gene_data": np.array([3.0, 7.0, 1.0, 9.0, 5.0]),
+        "gene_idxs": np.array([0, 1, 2, 3, 4]),
+        "feature_ids": FEATURE_IDS,
+        "tokenizer": tokenizer,
+        "gene_median": GENE_MEDIAN,
+        "max_len": 8,
+        "mask_prob": mask_prob,
+        "normalize": normalize,
+    }
+
+    looked_up = process_item(rng=np.random.default_rng(42), **kwargs)
+    precomputed = process_item(
+        rng=np.random.default_rng(42),
+        feature_token_ids=_lookup_token_ids(FEATURE_IDS, tokenizer.vocab),
+        **kwargs,
+    )
+
+    for key in ("text", "labels", "loss_mask"):
+        assert torch.equal(looked_up[key], precomputed[key])
+    if mask_prob == 0.0:
+        # [CLS] followed by the expressed genes that are in the vocab; ENSG_MISSING is dropped.
+        assert looked_up["text"].tolist() == expected_tokens
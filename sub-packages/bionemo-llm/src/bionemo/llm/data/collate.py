@@ -68,10 +68,16 @@ def padding_collate_fn(
     def _pad(tensors, padding_value):
         if max_length is not None:
             tensors = [t[:max_length] for t in tensors]
-        batched_tensors = torch.nn.utils.rnn.pad_sequence(tensors, batch_first=True, padding_value=padding_value)
         if min_length is None:
-            return batched_tensors
-        return torch.nn.functional.pad(batched_tensors, (0, min_length - batched_tensors.size(1)), value=padding_value)
+            return torch.nn.utils.rnn.pad_sequence(tensors, batch_first=True, padding_value=padding_value)
+        # With a minimum length the output is always exactly `min_length` wide (padding to the longest tensor and then
+        #  to `min_length` truncates anything longer), so write each tensor straight into a buffer of that size rather
+        #  than allocating a padded batch twice. This is the common case of fixed-length training, min == max length.
+        batched_tensors = tensors[0].new_full((len(tensors), min_length, *tensors[0].shape[1:]), padding_value)
+        for i, tensor in enumerate(tensors):
+            tensor = tensor[:min_length]
+            batched_tensors[i, : len(tensor)] = tensor
+        return batched_tensors
 
     return {
         k: _pad([s[k] for s in batch], padding_values[k])
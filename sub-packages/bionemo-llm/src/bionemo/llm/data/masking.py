@@ -15,7 +15,9 @@
 
 
 from dataclasses import dataclass
+from functools import cached_property
 
+import numpy as np
 import torch
 
 from bionemo.llm.data.types import Tokenizer
@@ -46,6 +48,18 @@ class BertMaskConfig:
         if self.random_token_prob + self.mask_token_prob > 1.0:
             raise ValueError("Sum of random_token_prob and mask_token_prob must be less than or equal to 1.0.")
 
+    @cached_property
+    def _special_token_table(self) -> np.ndarray:
+        """A boolean lookup table of whether each token id is one of the tokenizer's special tokens.
+
+        The final entry is False and stands in for every id past the largest special token id, so token ids are clipped
+        to the table rather than bounds-checked. Computed once, since `all_special_ids` is rebuilt on every access.
+        """
+        special_ids = np.asarray(self.tokenizer.all_special_ids, dtype=np.int64)
+        table = np.zeros(special_ids.max(initial=-1) + 2, dtype=bool)
+        table[special_ids] = True
+        return table
+
 
 def apply_bert_pretraining_mask(
     tokenized_sequence: torch.Tensor, random_seed: int, mask_config: BertMaskConfig
@@ -114,6 +128,66 @@ def apply_bert_pretraining_mask(
     return masked_sequence, labels, loss_mask
 
 
+def apply_bert_pretraining_mask_numpy(
+    tokenized_sequence: np.ndarray, rng: np.random.Generator, mask_config: BertMaskConfig
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Applies the pretraining mask to a tokenized sequence held in a numpy array.
+
+    This follows the same masking scheme as `apply_bert_pretraining_mask`, but draws from a numpy random generator.
+    Datasets can pass the generator they already seed per index, rather than deriving a seed from it to create a torch
+    generator. For the short sequences produced by a dataset's `__getitem__`, most of the time in the torch version
+    goes to per-op dispatch and creating that generator, both of which are avoided here.
+
+    Args:
+        tokenized_sequence: Tokenized protein sequence.
+        rng: Random number generator to draw the mask from. For reproducibility, it should be seeded deterministically,
+            e.g. from the dataset seed and sample index.
+        mask_config: Configuration for masking tokens in a BERT-style model.
+
+    Returns:
+        masked_sequence:
+            The tokenized sequence with some tokens masked.
+        labels:
+            An array the same shape as `masked_sequence` containing labels for the masked tokens, with -100 for
+            non-masked tokens.
+        loss_mask:
+            A boolean array the same shape as `masked_sequence`, where 'True' indicates which tokens should be included
+            in the loss.
+    """
+    if mask_config.tokenizer.mask_token_id is None:
+        raise ValueError("Tokenizer must have a mask token.")
+
+    if mask_config.random_token_prob + mask_config.mask_token_prob > 1.0:
+        raise ValueError("Sum of random_token_prob and mask_token_prob must be less than or equal to 1.0.")
+
+    mask_stop_1 = mask_config.mask_prob * mask_config.mask_token_prob
+    mask_stop_2 = mask_config.mask_prob * (mask_config.mask_token_prob + mask_config.random_token_prob)
+
+    random_draws = rng.random(tokenized_sequence.shape)  # Random draws for each token in [0, 1).
+
+    # Overall mask for a token being masked in some capacity, we don't want to mask special tokens.
+    special_token_table = mask_config._special_token_table
+    loss_mask = ~special_token_table[np.minimum(tokenized_sequence, len(special_token_table) - 1)]
+    loss_mask &= random_draws < mask_config.mask_prob
+
+    mask_token_mask = (random_draws < mask_stop_1) & loss_mask
+    random_token_mask = (random_draws >= mask_stop_1) & (random_draws < mask_stop_2) & loss_mask
+
+    masked_sequence = tokenized_sequence.copy()
+    masked_sequence[mask_token_mask] = mask_config.tokenizer.mask_token_id
+    masked_sequence[random_token_mask] = rng.integers(
+        low=mask_config.random_tokens.start,
+        high=mask_config.random_tokens.stop,
+        size=np.count_nonzero(random_token_mask),
+        dtype=masked_sequence.dtype,
+    )
+
+    labels = tokenized_sequence.copy()
+    labels[~loss_mask] = -100  # Ignore loss for non-masked tokens.
+
+    return masked_sequence, labels, loss_mask
+
+
 def add_cls_and_eos_tokens(
     sequence: torch.Tensor,
     labels: torch.Tensor,
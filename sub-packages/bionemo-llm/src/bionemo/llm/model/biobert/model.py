@@ -119,6 +119,26 @@ class BioBertOutput(BioBertOutputCore, total=False):
     hidden_states: Tensor
 
 
+def _masked_token_mean(embeddings: Tensor, masks: Tensor) -> Tensor:
+    """Averages each sequence's embeddings over positions `[1, mask - 1)`, skipping the leading <cls> and trailing <eos>.
+
+    The sum is a single batched matmul in the dtype of the embeddings (the GEMM accumulates in fp32 internally), so
+    bf16/fp16 inference never materializes an up-cast copy of the `[b, s, h]` embeddings. The division by the token
+    count is done in fp32, since bf16 can't represent counts above 256 exactly, and only touches the `[b, h]` output.
+
+    Args:
+        embeddings: Embeddings of shape `[b, s, h]`.
+        masks: The number of tokens in each sequence, including <cls> and <eos>, of shape `[b]`.
+
+    Returns:
+        The mean embedding of each sequence, of shape `[b, h]` and in the dtype of `embeddings`.
+    """
+    positions = torch.arange(embeddings.shape[1], device=embeddings.device).unsqueeze(0)
+    token_mask = (positions >= 1) & (positions < (masks - 1).unsqueeze(1))
+    summed = torch.einsum("bsh,bs->bh", embeddings, token_mask.to(embeddings.dtype))
+    return (summed.float() / (masks - 2).unsqueeze(1)).to(embeddings.dtype)
+
+
 PositionEmbeddingKinds = Literal["learned_absolute", "rope"]
 """Kinds of supported positional embeddings."""
 
@@ -136,8 +156,8 @@ class MegatronBioBertModel(LanguageModule):
         pre_process: Include embedding layer (used with pipeline parallelism)
         post_process: Include an output layer (used with pipeline parallelism)
         parallel_output: Do not gather the outputs, keep them split across tensor parallel ranks
-        share_embeddings_and_output_weights: When True, input embeddings and output logit weights are shared.
-            Defaults to False.
+        share_embeddings_and_output_weights: When True, input embeddings and output logit weights are shared, so the
+            output layer skips allocating its own `[vocab_size, hidden_size]` weight. Defaults to True.
         position_embedding_type: Position embedding type. Options ["learned_absolute", "rope"].
             Defaults is 'learned_absolute'.
         rotary_percent: Percent of rotary dimension to use for rotary position embeddings.
@@ -156,7 +176,7 @@ class MegatronBioBertModel(LanguageModule):
         post_process: bool = True,
         fp16_lm_cross_entropy: bool = False,
         parallel_output: bool = True,
-        share_embeddings_and_output_weights: bool = False,
+        share_embeddings_and_output_weights: bool = True,
         position_embedding_type: PositionEmbeddingKinds = "learned_absolute",
         rotary_percent: float = 1.0,
         seq_len_interpolation_factor: Optional[float] = None,
@@ -426,13 +446,7 @@ class MegatronBioBertModel(LanguageModule):
             embeddings = torch.transpose(hidden_states, 0, 1)
             masks = torch.sum(attention_mask, dim=1)
             # Collect masked embeddings.
-            output_embeddings = torch.zeros(
-                size=(embeddings.shape[0], embeddings.shape[2]),
-                dtype=embeddings.dtype,
-                device=torch.cuda.current_device(),
-            )
-            for i, (embedding, mask) in enumerate(zip(embeddings, masks)):
-                output_embeddings[i, :] = torch.mean(embedding[1 : mask - 1], dim=0)
+            output_embeddings = _masked_token_mean(embeddings, masks)
 
         if self.return_embeddings:
             return output_embeddings
@@ -489,7 +503,9 @@ class BioBertConfig(
     masked_softmax_fusion: bool = True
     persist_layer_norm: bool = True
     get_attention_mask_from_fusion: bool = True
-    share_embeddings_and_output_weights: bool = False  # try True
+    # Tie the output layer to the word embeddings so the largest parameter tensor (and its optimizer state) is only
+    #  allocated once.
+    share_embeddings_and_output_weights: bool = True
     make_vocab_size_divisible_by: int = 128
     position_embedding_type: PositionEmbeddingKinds = "learned_absolute"
     rotary_base: int = 10000
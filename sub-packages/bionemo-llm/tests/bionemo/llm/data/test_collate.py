@@ -207,3 +207,14 @@ def test_bert_padding_collate_fn_with_min_length_pads_extra():
     assert torch.all(torch.eq(collated_batch["text"], torch.tensor([[1, 2, 3, -1, -1], [10, 11, 12, -1, -1]])))
     for val in collated_batch.values():
         assert val.size(1) == 5
+
+
+@pytest.mark.parametrize("min_length", [2, 4, 6])
+def test_padding_collate_fn_with_min_length_matches_pad_then_pad_to_min_length(min_length):
+    batch = [{"my_key": torch.tensor([1, 2, 3])}, {"my_key": torch.tensor([4, 5, 6, 7])}]
+
+    collated_batch = padding_collate_fn(batch, padding_values={"my_key": -1}, min_length=min_length, max_length=5)
+
+    padded = torch.nn.utils.rnn.pad_sequence([s["my_key"] for s in batch], batch_first=True, padding_value=-1)
+    expected = torch.nn.functional.pad(padded, (0, min_length - padded.size(1)), value=-1)
+    torch.testing.assert_close(collated_batch["my_key"], expected)
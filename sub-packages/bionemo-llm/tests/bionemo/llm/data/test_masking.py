@@ -14,10 +14,16 @@
 # limitations under the License.
 
 
+import numpy as np
 import pytest
 import torch
 
-from bionemo.llm.data.masking import BertMaskConfig, add_cls_and_eos_tokens, apply_bert_pretraining_mask
+from bionemo.llm.data.masking import (
+    BertMaskConfig,
+    add_cls_and_eos_tokens,
+    apply_bert_pretraining_mask,
+    apply_bert_pretraining_mask_numpy,
+)
 
 
 class TestTokenizer:
@@ -202,6 +208,62 @@ def test_apply_bert_pretraining_mask_doesnt_mask_special_tokens():
     assert torch.all(~loss_mask)
 
 
+def test_apply_bert_pretraining_mask_numpy_converges_to_correct_probability():
+    sequence = np.ones(100_000, dtype=np.int64)
+
+    masked_sequence, labels, loss_mask = apply_bert_pretraining_mask_numpy(
+        sequence,
+        np.random.default_rng(123),
+        mask_config=BertMaskConfig(
+            tokenizer=TestTokenizer(),
+            random_tokens=range(3, 5),
+            mask_prob=0.5,
+            mask_token_prob=0.25,
+            random_token_prob=0.12,
+        ),
+    )
+
+    assert masked_sequence.dtype == labels.dtype == np.int64
+    np.testing.assert_array_equal(labels[loss_mask], sequence[loss_mask])
+    assert np.all(labels[~loss_mask] == -100)
+    np.testing.assert_array_equal(masked_sequence[~loss_mask], sequence[~loss_mask])
+
+    assert pytest.approx(loss_mask.mean(), abs=0.01) == 0.5
+    assert pytest.approx((masked_sequence == 32).mean(), abs=0.01) == 0.5 * 0.25
+    assert pytest.approx(np.isin(masked_sequence, [3, 4]).mean(), abs=0.01) == 0.5 * 0.12
+    assert pytest.approx((masked_sequence[loss_mask] == 1).mean(), abs=0.01) == 1.0 - (0.25 + 0.12)
+
+
+def test_apply_bert_pretraining_mask_numpy_is_reproducible_with_same_seed():
+    tokenized_sequence = np.random.default_rng(42).integers(0, 100, 1000)
+    mask_config = BertMaskConfig(mask_prob=0.5, tokenizer=TestTokenizer(), random_tokens=range(4, 24))
+
+    masked_sequence, labels, loss_mask = apply_bert_pretraining_mask_numpy(
+        tokenized_sequence, np.random.default_rng(123), mask_config
+    )
+    new_seq, new_labels, new_mask = apply_bert_pretraining_mask_numpy(
+        tokenized_sequence, np.random.default_rng(123), mask_config
+    )
+    np.testing.assert_array_equal(masked_sequence, new_seq)
+    np.testing.assert_array_equal(labels, new_labels)
+    np.testing.assert_array_equal(loss_mask, new_mask)
+
+    _, _, other_mask = apply_bert_pretraining_mask_numpy(tokenized_sequence, np.random.default_rng(321), mask_config)
+    assert not np.array_equal(loss_mask, other_mask)
+
+
+def test_apply_bert_pretraining_mask_numpy_doesnt_mask_special_tokens():
+    tokenized_sequence = np.zeros(1000, dtype=np.int64)
+    masked_sequence, labels, loss_mask = apply_bert_pretraining_mask_numpy(
+        tokenized_sequence,
+        np.random.default_rng(123),
+        mask_config=BertMaskConfig(mask_prob=0.5, tokenizer=TestTokenizer(), random_tokens=range(4, 24)),
+    )
+    assert np.all(masked_sequence == 0)
+    assert np.all(labels == -100)
+    assert not loss_mask.any()
+
+
 def test_add_cls_and_eos_tokens_both_tokens():
     sequence = torch.tensor([1, 2, 3])
     loss_mask = torch.tensor([False, True, False])
@@ -0,0 +1,36 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-Apache2
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from bionemo.llm.model.biobert.model import _masked_token_mean
+
+
+@pytest.mark.parametrize("dtype", [torch.float32, torch.bfloat16])
+def test_masked_token_mean_matches_per_row_mean(dtype):
+    generator = torch.Generator().manual_seed(42)
+    batch_size, seq_len, hidden_size = 6, 1024, 32
+    embeddings = torch.randn(batch_size, seq_len, hidden_size, generator=generator).to(dtype)
+    # Include the shortest valid sequence (<cls>, one token, <eos>) and lengths past 256, where bf16 counts round.
+    masks = torch.tensor([3, 17, 257, 300, 1000, 1024])
+
+    expected = torch.stack([torch.mean(embedding[1 : mask - 1], dim=0) for embedding, mask in zip(embeddings, masks)])
+    actual = _masked_token_mean(embeddings, masks)
+
+    assert actual.dtype == dtype
+    # Both sides round to bf16, so allow a few ulps of absolute error around means close to zero.
+    tolerance = {"atol": 1e-2, "rtol": 1.6e-2} if dtype == torch.bfloat16 else {}
+    torch.testing.assert_close(actual, expected, **tolerance)
@@ -22,10 +22,13 @@ import pytest
 from bionemo.core.data.load import load
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_directory() -> Path:
     """Gets the path to the directory with test data.
 
+    The path is resolved once per session, since `load` re-reads the resource registry and re-hashes the cached
+    download on every call.
+
     Returns:
         A Path object that is the directory with test data.
     """